@@ -7,16 +7,22 @@ This DAG implements a complete data pipeline from scraping to gold table:
 - Writes to Delta Lake tables (bronze -> silver -> gold)
 """
 
-import json
 import os
+import re
 import sys
-from datetime import timedelta
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import cache, partial
 from logging import getLogger
-from typing import Any, Dict, List
+from typing import Optional
 
 import duckdb
 import pyarrow as pa
-from deltalake import DeltaTable, write_deltalake
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+from deltalake import DeltaTable, WriterProperties, write_deltalake
 
 # Add project paths
 
@@ -49,13 +55,67 @@ STORAGE_OPTIONS = {
     "AWS_ALLOW_HTTP": "true",
 }
 
+# Parquet settings shared by every Delta write: zstd pages, ~128k-row groups
+WRITER_PROPERTIES = WriterProperties(
+    compression="ZSTD",
+    compression_level=3,
+    data_page_size_limit=1 << 20,
+    max_row_group_size=128_000,
+)
+TARGET_FILE_SIZE = 256 * 1024 * 1024
 
-def extract_raw_data() -> List[Dict[str, Any]]:
+# Local scratch space for handing silver to the gold task
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "lakehouse_etl")
+
+# Files replaced by an overwrite stay readable by time travel for this long
+# before vacuum deletes them; matches Delta's default 7 day retention
+VACUUM_RETENTION_HOURS = 7 * 24
+
+# Columns carried from one layer into the next; the rest are recomputed
+CARRIED_COLUMNS = ["url", "source", "title", "content", "processed_at"]
+
+# Number of concurrent GETs issued against the raw bucket
+DOWNLOAD_WORKERS = 32
+
+# Characters scrubbed from silver content before whitespace is collapsed
+CONTENT_SCRUB_PATTERN = r"[^\w\d\s\.,!?;:\-\(\)]+"
+
+# Threads scrubbing silver content, one column chunk each
+SCRUB_WORKERS = os.cpu_count() or 4
+
+# Fields read from the scraped JSON objects, anything else is ignored
+RAW_SCHEMA = pa.schema(
+    [
+        ("url", pa.string()),
+        ("title", pa.string()),
+        ("content", pa.string()),
+    ]
+)
+
+
+@cache
+def _get_splitter():
+    """Rust text splitter, built on first use and shared within the process."""
+    from semantic_text_splitter import TextSplitter
+
+    return TextSplitter(capacity=200, overlap=10)
+
+
+@cache
+def _get_duckdb_con() -> duckdb.DuckDBPyConnection:
+    """
+    In-memory DuckDB connection reused by every transform in this process.
+
+    Opened on first use rather than at import, so DAG parsing does not start
+    a database and forked task processes never inherit its threads.
+    """
+    return duckdb.connect(":memory:")
+
+
+def extract_raw_data() -> Optional[pa.Table]:
     """Extract data from MinIO bronze bucket."""
     logger.info("Extracting data from MinIO bronze bucket")
 
-    records = []
-
     try:
         minio_client = MinioIOService(
             endpoint="minio:9000",
@@ -63,69 +123,85 @@ def extract_raw_data() -> List[Dict[str, Any]]:
             secret_key=settings.minio.secret_key.get_secret_value(),
         )
 
-        # List objects in bronze bucket
-        objects = minio_client.list_objects("raw")
+        # List the JSON objects in bronze bucket, filtered server-side by prefix
+        objects = minio_client.list_objects("raw", prefix="json/")
+        json_names = [obj.object_name for obj in objects]
 
-        for obj in objects:
-            if obj.object_name.endswith(".json"):
-                # Download and parse JSON data
-                if raw_data := minio_client.download("raw", obj.object_name):
-                    data = json.loads(raw_data.decode("utf-8"))
-                    data["source"] = obj.object_name
-                    records.append(data)
+        # Download on the worker threads, parsing is left to Arrow below
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            payloads = executor.map(partial(minio_client.download, "raw"), json_names)
+            downloaded = [(name, raw) for name, raw in zip(json_names, payloads) if raw]
 
-        logger.info(f"Extracted {len(records)} records from bronze bucket")
+        if not downloaded:
+            return None
+
+        sources, payloads = zip(*downloaded)
+        records = pa_json.read_json(
+            pa.BufferReader(b"\n".join(payloads)),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=RAW_SCHEMA,
+                unexpected_field_behavior="ignore",
+            ),
+        )
+        records = records.append_column("source", pa.array(sources, pa.string()))
+
+        logger.info(f"Extracted {records.num_rows} records from bronze bucket")
         return records
 
     except Exception as e:
         logger.error(f"Failed to extract bronze data: {e}")
-        return []
+        return None
 
 
-def bronze_transform(**kwargs) -> None:
+def bronze_transform() -> Optional[pa.Table]:
     """Transform raw data to bronze table."""
     logger.info("Starting bronze transform")
     try:
-        records = extract_raw_data()
-        if not records:
+        arrow_table = extract_raw_data()
+        if arrow_table is None:
             logger.warning("No records found in bronze bucket")
-            return
-
-        arrow_table = pa.Table.from_pylist(records)
-        connection = duckdb.connect()
-        connection.register("raw", arrow_table)
-
-        bronze_df = connection.execute("""
-            SELECT
-                url,
-                source,
-                title,
-                TRIM(content) AS content,
-                NOW()::TIMESTAMP AS processed_at,
-                LENGTH(TRIM(content)) AS content_length
-            FROM raw
-            WHERE content IS NOT NULL AND LENGTH(TRIM(content)) > 0
-        """).arrow()
+            return None
+
+        # Trim once, then derive the length and the non-empty filter from it
+        content = pc.utf8_trim_whitespace(arrow_table["content"])
+        content_length = pc.utf8_length(content).cast(pa.int64())
+        processed_at = pa.scalar(datetime.now(), type=pa.timestamp("us"))
+
+        bronze_df = pa.table(
+            {
+                "url": arrow_table["url"],
+                "source": arrow_table["source"],
+                "title": arrow_table["title"],
+                "content": content,
+                "processed_at": pa.repeat(processed_at, arrow_table.num_rows),
+                "content_length": content_length,
+            }
+        ).filter(pc.greater(content_length, 0))
 
         write_deltalake(
             "s3://datalake/bronze",
             bronze_df,
             mode="overwrite",
             storage_options=STORAGE_OPTIONS,
+            writer_properties=WRITER_PROPERTIES,
+            target_file_size=TARGET_FILE_SIZE,
         )
+        return bronze_df
 
     except Exception as e:
         logger.error(f"Bronze transform failed: {e}")
         raise
 
 
-def silver_transform():
+def silver_transform(bronze_df: Optional[pa.Table] = None) -> pa.Table:
+    """Transform bronze data to silver table, reading bronze from Delta if needed."""
     logger.info("Starting silver transform")
 
     try:
-        # Load Delta table into DuckDB via delta-rs
-        table = DeltaTable("s3://datalake/bronze", storage_options=STORAGE_OPTIONS)
-        bronze_df = table.to_pyarrow_table()
+        if bronze_df is None:
+            # Load Delta table via delta-rs, projecting only the columns silver uses
+            table = DeltaTable("s3://datalake/bronze", storage_options=STORAGE_OPTIONS)
+            bronze_df = table.to_pyarrow_dataset().to_table(columns=CARRIED_COLUMNS)
 
         # Transform bronze to silver
         silver_pa = transform_bronze_to_silver(bronze_df, min_content_length=50)
@@ -136,13 +212,43 @@ def silver_transform():
             silver_pa,
             mode="overwrite",
             storage_options=STORAGE_OPTIONS,
+            writer_properties=WRITER_PROPERTIES,
+            target_file_size=TARGET_FILE_SIZE,
         )
+        return silver_pa
 
     except Exception as e:
         logger.error(f"Silver transform failed: {e}")
         raise
 
 
+def bronze_silver_transform(**kwargs) -> str:
+    """
+    Run bronze and silver in one task without re-reading bronze from Delta.
+    Silver is spilled to local Parquet and its path handed to gold via XCom.
+    """
+    silver_df = silver_transform(bronze_transform())
+
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    spill_path = os.path.join(
+        SPILL_DIR, re.sub(r"[^\w.-]", "_", kwargs["run_id"]) + ".parquet"
+    )
+    pq.write_table(silver_df.select(CARRIED_COLUMNS), spill_path)
+
+    logger.info(f"Spilled {silver_df.num_rows} silver rows to {spill_path}")
+    return spill_path
+
+
+def _scrub_content(content: pa.Array) -> pa.Array:
+    """Drop disallowed characters, lowercase and collapse whitespace."""
+    content = pc.replace_substring_regex(
+        content, pattern=CONTENT_SCRUB_PATTERN, replacement=" "
+    )
+    content = pc.utf8_lower(content)
+    content = pc.replace_substring_regex(content, pattern=r"\s+", replacement=" ")
+    return pc.utf8_trim_whitespace(content)
+
+
 def transform_bronze_to_silver(
     bronze_df: pa.Table,
     min_content_length: int = 50,
@@ -151,40 +257,28 @@ def transform_bronze_to_silver(
     Transform bronze data to silver format.
     Removes duplicate row by url
     """
-    con = duckdb.connect()
-    con.register("bronze", bronze_df)
+    # Scrub content chunks in parallel with Arrow's regex kernels, which
+    # release the GIL; DuckDB only dedups
+    content = bronze_df["content"]
+    with ThreadPoolExecutor(max_workers=SCRUB_WORKERS) as executor:
+        content = pa.chunked_array(
+            list(executor.map(_scrub_content, content.chunks)), type=content.type
+        )
 
-    query = f"""
-        WITH cleaned AS (
-            SELECT 
-                *,
-                TRIM(
-                    REGEXP_REPLACE(
-                        LOWER(
-                            REGEXP_REPLACE(
-                                content,
-                                '[^\\w\\d\\s\\.,!?;:\\-\\(\\)]',
-                                ' ',
-                                'g'
-                            )
-                        ),
-                        '\\s+',
-                        ' ',
-                        'g'
-                    )
-                ) AS cleaned_content
-            FROM bronze
-            WHERE content IS NOT NULL
-        ),
-        ranked AS (
+    duckdb_con = _get_duckdb_con()
+    duckdb_con.register("bronze", bronze_df.append_column("cleaned_content", content))
+
+    query = """
+        WITH ranked AS (
             SELECT
                 *,
                 ROW_NUMBER() OVER (
                     PARTITION BY url
                     ORDER BY processed_at
                 ) AS row_number
-            FROM cleaned
-            WHERE LENGTH(cleaned_content) > {min_content_length}
+            FROM bronze
+            WHERE content IS NOT NULL
+                AND LENGTH(cleaned_content) > ?
         )
         SELECT
             url,
@@ -198,51 +292,71 @@ def transform_bronze_to_silver(
         WHERE row_number = 1
     """
 
-    silver_df = con.execute(query).arrow()
+    silver_df = duckdb_con.execute(query, [min_content_length]).arrow()
 
-    con.close()
+    duckdb_con.unregister("bronze")
     return silver_df
 
 
-def _split_content(content: str) -> List[str]:
-    from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=200,
-        chunk_overlap=10,
-        add_start_index=True,
-    )
-    return splitter.split_text(content)
-
-
-def gold_transform():
+def gold_transform(**kwargs):
     """Transform silver data to gold table."""
     logger.info("Starting gold transform")
 
     try:
-        # Read from silver Delta table into PyArrow
-        silver_table = DeltaTable(
-            "s3://datalake/silver",
-            storage_options=STORAGE_OPTIONS,
+        spill_path = kwargs["ti"].xcom_pull(task_ids="bronze_silver")
+        if spill_path and os.path.exists(spill_path):
+            # Silver handed over by the upstream task on this host
+            silver_df = pq.read_table(spill_path, columns=CARRIED_COLUMNS)
+        else:
+            # Read from silver Delta table into PyArrow
+            silver_table = DeltaTable(
+                "s3://datalake/silver",
+                storage_options=STORAGE_OPTIONS,
+            )
+            silver_df = silver_table.to_pyarrow_dataset().to_table(
+                columns=CARRIED_COLUMNS
+            )
+
+        # Explode chunks in Arrow: repeat each parent row once per chunk
+        chunks = pa.array(
+            _get_splitter().chunk_all(silver_df["content"].to_pylist()),
+            type=pa.list_(pa.string()),
         )
-        silver_df = silver_table.to_pandas()
-
-        gold_df = silver_df.copy()
-        gold_df["chunks"] = gold_df["content"].apply(_split_content)
-        gold_df = (
-            gold_df.explode("chunks")
-            .rename(columns={"chunks": "chunk"})
-            .reset_index(drop=True)
+        gold_df = silver_df.take(pc.list_parent_indices(chunks)).append_column(
+            "chunk", pc.list_flatten(chunks)
         )
 
-        # Write to Delta using delta-rs
+        # Partition key: host part of the page url
+        gold_df = gold_df.append_column(
+            "source_host",
+            pc.struct_field(
+                pc.extract_regex(gold_df["url"], r"https?://(?P<host>[^/]+)"),
+                "host",
+            ),
+        )
+
+        # Write to Delta using delta-rs, which writes partitions concurrently
         write_deltalake(
-            "s3://datalake/silver",
+            "s3://datalake/gold",
             gold_df,
+            partition_by=["source_host"],
             mode="overwrite",
             storage_options=STORAGE_OPTIONS,
+            writer_properties=WRITER_PROPERTIES,
+            target_file_size=TARGET_FILE_SIZE,
         )
 
+        # Each overwrite tombstones the previous version's files; delete the
+        # ones past the retention window so storage does not grow per run
+        removed = DeltaTable(
+            "s3://datalake/gold",
+            storage_options=STORAGE_OPTIONS,
+        ).vacuum(retention_hours=VACUUM_RETENTION_HOURS, dry_run=False)
+        logger.info(f"Vacuumed gold: {len(removed)} files removed")
+
+        if spill_path and os.path.exists(spill_path):
+            os.remove(spill_path)
+
         logger.info(f"Gold transform completed: {gold_df.num_rows} rows")
 
     except Exception as e:
@@ -286,15 +400,9 @@ with DAG(
         environment=dict(os.environ),
     )
 
-    bronze = PythonOperator(
-        task_id="bronze_transform",
-        python_callable=bronze_transform,
-        provide_context=True,
-    )
-
-    silver = PythonOperator(
-        task_id="silver",
-        python_callable=silver_transform,
+    bronze_silver = PythonOperator(
+        task_id="bronze_silver",
+        python_callable=bronze_silver_transform,
         provide_context=True,
     )
 
@@ -304,4 +412,4 @@ with DAG(
         provide_context=True,
     )
 
-    scrape_task >> bronze >> silver >> gold
+    scrape_task >> bronze_silver >> gold
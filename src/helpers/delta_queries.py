@@ -1,3 +1,4 @@
+import duckdb
 from deltalake import DeltaTable
 
 # Paths to Delta tables
@@ -5,6 +6,9 @@ BRONZE_PATH = "data/delta/bronze"
 SILVER_PATH = "data/delta/silver"
 GOLD_PATH = "data/delta/gold"
 
+# Shared in-memory connection for the SQL-backed analyses
+con = duckdb.connect(":memory:")
+
 
 def get_delta_table_as_df(table_path):
     """Read a Delta table and return as pandas DataFrame."""
@@ -12,6 +16,11 @@ def get_delta_table_as_df(table_path):
     return dt.to_pandas()
 
 
+def get_delta_table_as_dataset(table_path):
+    """Open a Delta table as a pyarrow dataset for DuckDB to scan."""
+    return DeltaTable(table_path).to_pyarrow_dataset()
+
+
 def query_bronze_table():
     """Query the bronze table - raw scraped data."""
     df = get_delta_table_as_df(BRONZE_PATH)
@@ -44,21 +53,42 @@ def query_gold_table():
 
 def analyze_content_lengths():
     """Analyze content lengths across all tables."""
-    bronze_df = get_delta_table_as_df(BRONZE_PATH)
-    silver_df = get_delta_table_as_df(SILVER_PATH)
-    gold_df = get_delta_table_as_df(GOLD_PATH)
+    con.register("bronze", get_delta_table_as_dataset(BRONZE_PATH))
+    con.register("silver", get_delta_table_as_dataset(SILVER_PATH))
+    con.register("gold", get_delta_table_as_dataset(GOLD_PATH))
+
+    result = con.execute("""
+        SELECT 'Bronze', AVG(LENGTH(content)) FROM bronze
+        UNION ALL
+        SELECT 'Silver', AVG(LENGTH(content)) FROM silver
+        UNION ALL
+        SELECT 'Gold', AVG(LENGTH(content)) FROM gold
+    """).fetchall()
 
     print("Content length analysis:")
-    print(f"Bronze: {bronze_df['content'].str.len().mean():.1f} chars avg")
-    print(f"Silver: {silver_df['content'].str.len().mean():.1f} chars avg")
-    print(f"Gold: {gold_df['content'].str.len().mean():.1f} chars avg")
+    for table_name, avg_length in result:
+        # AVG over an empty table is NULL; print nan as the pandas version did
+        if avg_length is None:
+            avg_length = float("nan")
+        print(f"{table_name}: {avg_length:.1f} chars avg")
 
 
 def find_duplicates():
     """Find potential duplicates in bronze table."""
-    df = get_delta_table_as_df(BRONZE_PATH)
-    duplicates = df[df.duplicated(subset=["content"], keep=False)]
-    print(f"Found {len(duplicates)} duplicate records in bronze table")
+    con.register("bronze", get_delta_table_as_dataset(BRONZE_PATH))
+    # Group on the 64-bit content hash first, then confirm on the full
+    # string only for the colliding rows
+    duplicates = con.execute("""
+        WITH candidates AS (
+            SELECT *
+            FROM bronze
+            QUALIFY COUNT(*) OVER (PARTITION BY HASH(content)) > 1
+        )
+        SELECT *
+        FROM candidates
+        QUALIFY COUNT(*) OVER (PARTITION BY content) > 1
+    """).arrow()
+    print(f"Found {duplicates.num_rows} duplicate records in bronze table")
     return duplicates
 
 
@@ -6,19 +6,17 @@ BRONZE_PATH = "data/delta/bronze"
 SILVER_PATH = "data/delta/silver"
 GOLD_PATH = "data/delta/gold"
 
+# Shared in-memory connection, reused across queries in this process
+con = duckdb.connect(":memory:")
 
-def setup_duckdb_connection():
-    """Create DuckDB connection and register Delta tables."""
-    con = duckdb.connect()
-
-    # Register Delta tables as views
-    bronze_df = DeltaTable(BRONZE_PATH).to_pandas()
-    silver_df = DeltaTable(SILVER_PATH).to_pandas()
-    gold_df = DeltaTable(GOLD_PATH).to_pandas()
 
-    con.register("bronze", bronze_df)
-    con.register("silver", silver_df)
-    con.register("gold", gold_df)
+def setup_duckdb_connection():
+    """Register Delta tables on the shared DuckDB connection."""
+    # Register Delta tables as views over Arrow datasets so DuckDB can push
+    # projections and filters down into the Parquet scan
+    con.register("bronze", DeltaTable(BRONZE_PATH).to_pyarrow_dataset())
+    con.register("silver", DeltaTable(SILVER_PATH).to_pyarrow_dataset())
+    con.register("gold", DeltaTable(GOLD_PATH).to_pyarrow_dataset())
 
     return con
 
@@ -84,8 +82,6 @@ def run_data_quality_queries():
             f"  {table_name}: {missing_content} missing content, {missing_title} missing title"
         )
 
-    con.close()
-
 
 def run_content_analysis():
     """Run content analysis queries."""
@@ -125,15 +121,11 @@ def run_content_analysis():
     total, unique, duplicates = result[0]
     print(f"  Bronze: {total} total, {unique} unique, {duplicates} duplicates")
 
-    con.close()
-
 
 def run_custom_query(sql_query):
     """Run a custom SQL query on the Delta tables."""
     con = setup_duckdb_connection()
-    result = con.execute(sql_query).fetchall()
-    con.close()
-    return result
+    return con.execute(sql_query).fetchall()
 
 
 if __name__ == "__main__":
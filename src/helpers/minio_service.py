@@ -1,11 +1,20 @@
 import io
 import logging
-from typing import Optional
+from typing import BinaryIO, Optional
 
+import urllib3
 from minio import Minio, S3Error
 
 logger = logging.getLogger(__name__)
 
+# Part size used when streaming file-like objects of unknown length
+STREAM_PART_SIZE = 16 * 1024 * 1024
+
+# In-memory payloads above this size are sent as parallel multipart uploads
+MULTIPART_THRESHOLD = 5 * 1024 * 1024
+MULTIPART_PART_SIZE = 5 * 1024 * 1024
+MULTIPART_PARALLEL_UPLOADS = 4
+
 
 class MinioIOService:
     def __init__(
@@ -14,12 +23,25 @@ class MinioIOService:
         access_key: Optional[str] = None,
         secret_key: Optional[str] = None,
         secure=False,
+        pool_maxsize: int = 64,
     ):
+        # Keep enough pooled connections for concurrent workers sharing this
+        # client, otherwise urllib3 drops and re-opens sockets past its limit
+        http_client = urllib3.PoolManager(
+            maxsize=pool_maxsize,
+            timeout=urllib3.Timeout(connect=300, read=300),
+            retries=urllib3.Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504],
+            ),
+        )
         self.client = Minio(
             endpoint,
             access_key=access_key,
             secret_key=secret_key,
             secure=secure,
+            http_client=http_client,
         )
 
     def ensure_bucket(self, bucket):
@@ -31,21 +53,48 @@ class MinioIOService:
         self,
         bucket: str,
         object_name: str,
-        data: bytes | str,
+        data: bytes | str | BinaryIO,
         content_type: str = "text/plain",
+        length: int = -1,
+        metadata: Optional[dict] = None,
     ):
         self.ensure_bucket(bucket)
 
         if isinstance(data, str):
             data = data.encode("utf-8")
 
-        self.client.put_object(
-            bucket,
-            object_name,
-            data=io.BytesIO(data),
-            length=len(data),
-            content_type=content_type,
-        )
+        if isinstance(data, (bytes, bytearray)) and len(data) > MULTIPART_THRESHOLD:
+            # One PUT is limited to a single connection; split large bodies
+            self.client.put_object(
+                bucket,
+                object_name,
+                data=io.BytesIO(data),
+                length=len(data),
+                part_size=MULTIPART_PART_SIZE,
+                num_parallel_uploads=MULTIPART_PARALLEL_UPLOADS,
+                content_type=content_type,
+                metadata=metadata,
+            )
+        elif isinstance(data, (bytes, bytearray)):
+            self.client.put_object(
+                bucket,
+                object_name,
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type=content_type,
+                metadata=metadata,
+            )
+        else:
+            # Stream file-like sources; unknown lengths go up as multipart
+            self.client.put_object(
+                bucket,
+                object_name,
+                data=data,
+                length=length,
+                part_size=STREAM_PART_SIZE,
+                content_type=content_type,
+                metadata=metadata,
+            )
         logging.info(f"Uploaded {object_name} to {bucket}")
 
     def download(self, bucket, object_name):
@@ -56,4 +105,10 @@ class MinioIOService:
             return None
 
     def list_objects(self, bucket, prefix="", recursive=True):
+        """
+        List objects in a bucket, filtered server-side by key prefix.
+
+        Scraped pages are stored as `json/<page>.json` and `html/<page>.html.gz`
+        in the `raw` bucket, so consumers list one format by its prefix.
+        """
         return self.client.list_objects(bucket, prefix=prefix, recursive=recursive)
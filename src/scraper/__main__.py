@@ -80,6 +80,12 @@ def main():
         action="store_true",
         help="Enable rate limit",
     )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=2.0,
+        help="Maximum requests per second to a host when rate limited (default: 2.0)",
+    )
     parser.add_argument(
         "--timeout",
         type=int,
@@ -104,6 +110,24 @@ def main():
         default=50,
         help="Minimum content length to extract (default: 50)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum pages fetched in parallel (default: 8)",
+    )
+    parser.add_argument(
+        "--upload-concurrency",
+        type=int,
+        default=4,
+        help="Maximum parallel uploads to object storage (default: 4)",
+    )
+    parser.add_argument(
+        "--max-page-bytes",
+        type=int,
+        default=None,
+        help="Skip pages larger than this many bytes (default: no limit)",
+    )
 
     # Output options
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
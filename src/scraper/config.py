@@ -2,7 +2,7 @@ import argparse
 import logging
 import sys
 from dataclasses import dataclass
-from typing import Any, Type
+from typing import Any, Optional, Type
 
 import yaml
 
@@ -14,12 +14,16 @@ class ScraperConfig:
     """Configuration class for scraper settings."""
 
     rate_limit: bool = True
+    requests_per_second: float = 2.0
     timeout: int = 30
     max_retries: int = 3
     user_agent: str = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15"
     respect_robots: bool = True
     max_pages: int = 100
     min_content_length: int = 50
+    concurrency: int = 8
+    upload_concurrency: int = 4
+    max_page_bytes: Optional[int] = None
 
     @classmethod
     def from_args(
@@ -28,12 +32,16 @@ class ScraperConfig:
     ) -> "ScraperConfig":
         return cls(
             rate_limit=args.rate_limit,
+            requests_per_second=args.requests_per_second,
             timeout=args.timeout,
             max_retries=args.max_retries,
             user_agent=args.user_agent,
             respect_robots=not args.ignore_robots,
             max_pages=args.max_pages,
             min_content_length=args.min_content_length,
+            concurrency=args.concurrency,
+            upload_concurrency=args.upload_concurrency,
+            max_page_bytes=args.max_page_bytes,
         )
 
     @classmethod
@@ -44,12 +52,20 @@ class ScraperConfig:
         advanced = config["advanced"]
         return cls(
             rate_limit=advanced["rate_limit"],
+            requests_per_second=advanced.get(
+                "requests_per_second", cls.requests_per_second
+            ),
             timeout=advanced["timeout"],
             max_retries=advanced["max_retries"],
             user_agent=advanced["user_agent"],
             respect_robots=advanced["respect_robots"],
             max_pages=advanced["max_pages"],
             min_content_length=advanced["min_content_length"],
+            concurrency=advanced.get("concurrency", cls.concurrency),
+            upload_concurrency=advanced.get(
+                "upload_concurrency", cls.upload_concurrency
+            ),
+            max_page_bytes=advanced.get("max_page_bytes", cls.max_page_bytes),
         )
 
 
@@ -0,0 +1,37 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting requests to a single host.
+
+    Requests are free while tokens remain; past that each caller reserves the
+    next slot under the lock and sleeps outside it, so concurrent workers are
+    spaced `1 / rate` seconds apart without holding the lock while waiting.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "last", "_lock")
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Consume one token, blocking until it is available. Returns the wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last) * self.rate
+            )
+            self.last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
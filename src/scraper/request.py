@@ -1,5 +1,11 @@
-import requests.adapters
-from urllib3 import Retry
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+
+# Status codes worth retrying with backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 
 class RetryingSession:
@@ -7,42 +13,76 @@ class RetryingSession:
         self,
         max_retries: int = 3,
         user_agent: str = "Mozilla/5.0",
+        pool_size: int = 10,
+        backoff_factor: float = 0.5,
     ) -> None:
-        self.session = requests.Session()
-        self._configure_adapter(max_retries)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.Client(
+            transport=self._configure_transport(max_retries, pool_size),
+            follow_redirects=True,
+        )
         self._set_headers(user_agent)
 
-    def _configure_adapter(self, max_retries: int) -> None:
-        """Create a requests session with retry logic"""
+    def _configure_transport(
+        self, max_retries: int, pool_size: int
+    ) -> httpx.HTTPTransport:
+        """Create an HTTP/2 transport with connection retries and pooling"""
 
-        # Configure retry strategy
-        retry = Retry(
-            total=max_retries,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=0.5,
+        # HTTP/2 multiplexes concurrent requests to one origin over a single
+        # connection; the pool bound only matters for HTTP/1.1 servers
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
         )
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        return httpx.HTTPTransport(http2=True, limits=limits, retries=max_retries)
 
     def _set_headers(self, user_agent: str) -> None:
-        """Create a requests session with proper headers."""
-        self.session.headers.update(
+        """Set browser-like default headers on the client."""
+        self.client.headers.update(
             {
                 "User-Agent": user_agent,
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
                 "Accept-Language": "en-US,en;q=0.5",
                 "Accept-Encoding": "gzip, deflate",
-                "Connection": "keep-alive",
             }
         )
 
-    def get(self, url: str, **kwargs) -> requests.Response:
-        """Send a GET request."""
-        response = self.session.get(url, **kwargs)
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait before retrying, honouring a numeric Retry-After."""
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2**attempt)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        """Send a GET request, retrying retryable status codes."""
+        for attempt in range(self.max_retries + 1):
+            response = self.client.get(url, **kwargs)
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt == self.max_retries
+            ):
+                break
+            time.sleep(self._retry_delay(response, attempt))
         response.raise_for_status()
         return response
 
+    @contextmanager
+    def stream(self, url: str, **kwargs) -> Iterator[httpx.Response]:
+        """Send a GET request whose body is read lazily inside the block."""
+        for attempt in range(self.max_retries + 1):
+            with self.client.stream("GET", url, **kwargs) as response:
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt == self.max_retries
+                ):
+                    response.raise_for_status()
+                    yield response
+                    return
+                delay = self._retry_delay(response, attempt)
+            # Sleep with the connection already released back to the pool
+            time.sleep(delay)
+
     def close(self):
-        self.session.close()
+        self.client.close()
@@ -7,25 +7,69 @@ Features include rate limiting, robots.txt compliance, error handling, and MinIO
 
 import concurrent
 import concurrent.futures
-import json
+import gzip
 import logging
-import random
+import threading
 import time
-from typing import Dict, List, Optional, Set
-from urllib.parse import urljoin, urlparse
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import (
+    urljoin,
+    urlparse,
+    urlsplit,
+    urlunsplit,
+)
 from urllib.robotparser import RobotFileParser
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import lxml.html
+import orjson
+from lxml import etree
+from lxml.cssselect import CSSSelector
 
 from config.settings import Settings
 from helpers.minio_service import MinioIOService
 from scraper.config import ScraperConfig
+from scraper.rate_limit import TokenBucket
 from scraper.request import RetryingSession
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a robots.txt response before allowing the host
+ROBOTS_TIMEOUT = 5
+
+# Bytes read from the response per parser feed
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Content types parsed as pages; anything else is skipped unread
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Raw HTML is stored gzipped; level 6 is zlib's usual speed/size balance
+HTML_GZIP_LEVEL = 6
+
+# Text nodes under an element, skipping script and style bodies
+_TEXT_NODES = etree.XPath(
+    "descendant::text()[not(ancestor::script or ancestor::style)]"
+)
+
+# Every anchor href in the document, as plain strings
+_HREFS = etree.XPath("//a/@href", smart_strings=False)
+
+# Link schemes and fragments that never lead to another page
+_SKIPPED_HREF_PREFIXES = ("#", "javascript:", "mailto:", "tel:")
+
+
+@lru_cache(maxsize=512)
+def _compile_css(selector: str) -> etree.XPath:
+    """Translate a CSS selector to a compiled XPath, cached for the process."""
+    return CSSSelector(selector, translator="html")
+
+
+def _element_text(element: lxml.html.HtmlElement) -> str:
+    """Concatenate the stripped text of an element."""
+    return "".join(text.strip() for text in _TEXT_NODES(element))
+
 
 class Scraper:
     """
@@ -40,6 +84,9 @@ class Scraper:
     - Logging for monitoring and debugging
     """
 
+    # Characters replaced when turning a URL into an object name
+    _SAN_TABLE = str.maketrans({"/": "_", "?": "_", "&": "_"})
+
     def __init__(
         self,
         settings: Settings,
@@ -55,9 +102,13 @@ class Scraper:
         """
         self.config = config or ScraperConfig()
         self.visited: Set[str] = set()
+        # Guards the per-host caches shared by crawl workers; held only for
+        # the dict operations, never across network I/O or parsing
+        self._state_lock = threading.Lock()
         self.session = session or RetryingSession(
             max_retries=self.config.max_retries,
             user_agent=self.config.user_agent,
+            pool_size=self.config.concurrency,
         )
         secret_key = (
             settings.minio.secret_key.get_secret_value()
@@ -69,7 +120,39 @@ class Scraper:
             access_key=settings.minio.access_key,
             secret_key=secret_key,
         )
-        self.robots_parser: Optional[RobotFileParser] = None
+        # robots.txt per origin; None means no usable file, so allow all
+        self.robots_parsers: Dict[str, Optional[RobotFileParser]] = {}
+        # Request rate limiter per host, shared by all crawl workers
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Upload pool shared by every page of the running crawl
+        self._upload_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def _load_robots(self, origin: str) -> Optional[RobotFileParser]:
+        """
+        Fetch and parse robots.txt for an origin through the pooled session.
+
+        Args:
+            origin: Scheme and host, e.g. https://example.com
+
+        Returns:
+            Parsed robots.txt, or None if it is missing or unreachable
+        """
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=ROBOTS_TIMEOUT)
+        except httpx.HTTPStatusError as e:
+            # Same policy as RobotFileParser.read: auth errors deny everything
+            if e.response.status_code in (401, 403):
+                parser = RobotFileParser()
+                parser.disallow_all = True
+                return parser
+            return None
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e}")
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        return parser
 
     def _can_crawl(self, url: str) -> bool:
         """
@@ -86,14 +169,24 @@ class Scraper:
 
         try:
             parsed_url = urlparse(url)
-            robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+            origin = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+            with self._state_lock:
+                cached = origin in self.robots_parsers
+                robots_parser = self.robots_parsers.get(origin)
+
+            if not cached:
+                # Fetch outside the lock; a racing worker may fetch it too
+                robots_parser = self._load_robots(origin)
+                with self._state_lock:
+                    robots_parser = self.robots_parsers.setdefault(
+                        origin, robots_parser
+                    )
 
-            if self.robots_parser is None:
-                self.robots_parser = RobotFileParser()
-                self.robots_parser.set_url(robots_url)
-                self.robots_parser.read()
+            if robots_parser is None:
+                return True
 
-            return self.robots_parser.can_fetch(self.config.user_agent, url)
+            return robots_parser.can_fetch(self.config.user_agent, url)
 
         except Exception as e:
             logger.warning(f"Could not check robots.txt for {url}: {e}")
@@ -109,204 +202,385 @@ class Scraper:
         Returns:
             Sanitized string safe for use as filename
         """
-        return (
-            url.replace("://", "_")
-            .replace("/", "_")
-            .replace("?", "_")
-            .replace("&", "_")
-        )
+        return url.replace("://", "_").translate(self._SAN_TABLE)
 
-    def _extract_content(
-        self, soup: BeautifulSoup, selectors: Dict[str, str]
-    ) -> Dict[str, Optional[str]]:
+    def _canonicalize(self, url: str) -> str:
         """
-        Extract content from BeautifulSoup object using CSS selectors.
+        Normalize a URL so equivalent spellings dedupe to one key.
+
+        Lowercases scheme and host, drops default ports and the fragment,
+        sorts query parameters and strips the trailing slash.
 
         Args:
-            soup: BeautifulSoup object
-            selectors: Dictionary of {key: css_selector} pairs
+            url: The URL to normalize
+
+        Returns:
+            Canonical form of the URL
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.netloc.lower()
+
+        default_port = {"http": ":80", "https": ":443"}.get(scheme)
+        if default_port and netloc.endswith(default_port):
+            netloc = netloc[: -len(default_port)]
+
+        path = parts.path.rstrip("/") or "/"
+        # Sort the raw pairs; decoding and re-encoding would change the bytes
+        # sent to the server (`?flag` -> `?flag=`, `%20` -> `+`)
+        query = "&".join(sorted(parts.query.split("&")))
+
+        return urlunsplit((scheme, netloc, path, query, ""))
+
+    def _extract_page(
+        self,
+        tree: lxml.html.HtmlElement,
+        selectors: List[Tuple[str, etree.XPath]],
+        current_url: str,
+        domain: str,
+    ) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """
+        Extract selector content and internal links from a parsed lxml tree.
+
+        Args:
+            tree: Root element of the parsed page
+            selectors: Compiled (key, selector) pairs from crawl_site
+            current_url: The current page URL
+            domain: The domain to restrict links to
 
         Returns:
-            Dictionary of extracted content
+            Tuple of the extracted content dictionary and the internal URLs
         """
         data = {}
-        for key, selector in selectors.items():
-            try:
-                element = soup.select_one(selector)
-                if element:
-                    text = element.get_text(strip=True)
-                    # Filter out very short content
-                    if len(text) >= self.config.min_content_length:
-                        data[key] = text
-                    else:
-                        data[key] = None
-                        logger.debug(
-                            f"Content for '{key}' too short: {len(text)} chars"
-                        )
+        for key, selector in selectors:
+            elements = selector(tree)
+            if elements:
+                text = _element_text(elements[0])
+                # Filter out very short content
+                if len(text) >= self.config.min_content_length:
+                    data[key] = text
                 else:
                     data[key] = None
-                    logger.debug(f"No element found for selector '{selector}'")
-            except Exception as e:
-                logger.warning(f"Error extracting content for '{key}': {e}")
+                    logger.debug(f"Content for '{key}' too short: {len(text)} chars")
+            else:
                 data[key] = None
+                logger.debug(f"No element found for selector '{key}'")
+
+        # Skip empty, javascript, mailto, etc. and resolve the rest
+        scheme = current_url.partition("://")[0]
+        links = [
+            link
+            for href in _HREFS(tree)
+            if href and not href.startswith(_SKIPPED_HREF_PREFIXES)
+            if (link := self._resolve_internal_link(href, current_url, scheme, domain))
+        ]
+
+        return data, links
+
+    def _resolve_internal_link(
+        self, href: str, current_url: str, scheme: str, domain: str
+    ) -> Optional[str]:
+        """
+        Resolve an href against the current page, keeping same-domain links.
+
+        Root-relative and absolute hrefs are handled with string checks; only
+        page-relative forms and paths with dot segments go through urljoin.
 
-        return data
+        Args:
+            href: Raw href attribute value
+            current_url: The current page URL
+            scheme: Scheme of the current page URL
+            domain: The domain to restrict links to
+
+        Returns:
+            Absolute URL, or None if the link is external or malformed
+        """
+        if "/." not in href:
+            if href.startswith("//"):
+                absolute_url, rest = f"{scheme}:{href}", href[2:]
+            elif href.startswith("/"):
+                # Root-relative paths are always on the current host
+                return f"{scheme}://{domain}{href}"
+            elif href.startswith(("http://", "https://")):
+                absolute_url, rest = href, href.partition("://")[2]
+            else:
+                rest = None
+
+            if rest is not None:
+                # Host must match exactly, up to the end of the authority
+                host, end = rest[: len(domain)], rest[len(domain) : len(domain) + 1]
+                if host.lower() == domain and end in ("", "/", "?", "#"):
+                    return absolute_url
+                return None
+
+        try:
+            absolute_url = urljoin(current_url, href)
+            if urlparse(absolute_url).netloc.lower() == domain:
+                return absolute_url
+        except Exception as e:
+            logger.debug(f"Could not process link {href}: {e}")
+        return None
 
     def _save_to_object_store(
         self,
         url: str,
-        html_content: str,
+        html_content: bytes,
         extracted_data: Dict[str, Optional[str]],
     ) -> None:
         """
-        Save scraped data to MinIO.
+        Queue scraped data for upload to MinIO without waiting on it.
 
         Args:
             url: The source URL
-            html_content: Raw HTML content
+            html_content: Raw HTML bytes, stored gzip-compressed
             extracted_data: Extracted content dictionary
         """
         try:
             sanitized_url = self._sanitize_url(url)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-                futures = [
-                    executor.submit(
-                        self.obj_store.upload,
-                        "raw",
-                        f"{sanitized_url}.html",
-                        html_content,
-                        content_type="text/html",
-                    ),
-                    executor.submit(
-                        self.obj_store.upload,
-                        "raw",
-                        f"{sanitized_url}.json",
-                        json.dumps(extracted_data, indent=2),
-                        content_type="application/json",
-                    ),
-                ]
-                concurrent.futures.wait(futures)
-                logger.info("Save html and json file to bucket `raw` ")
+            futures = [
+                self._upload_executor.submit(
+                    self.obj_store.upload,
+                    "raw",
+                    f"html/{sanitized_url}.html.gz",
+                    gzip.compress(html_content, compresslevel=HTML_GZIP_LEVEL),
+                    content_type="text/html",
+                    metadata={"Content-Encoding": "gzip"},
+                ),
+                self._upload_executor.submit(
+                    self.obj_store.upload,
+                    "raw",
+                    f"json/{sanitized_url}.json",
+                    orjson.dumps(extracted_data),
+                    content_type="application/json",
+                ),
+            ]
+            for future in futures:
+                future.add_done_callback(partial(self._log_upload_failure, url))
 
         except Exception as e:
             logger.error(f"Failed to save data for {url}: {e}")
 
-    def crawl_site(
-        self,
-        start_url: str,
-        selectors: Dict[str, str],
-    ) -> None:
-        """
-        Crawl a website and scrape all internal pages.
+    def _log_upload_failure(self, url: str, future: concurrent.futures.Future) -> None:
+        """Log a failed background upload for a page."""
+        if error := future.exception():
+            logger.error(f"Failed to save data for {url}: {error}")
 
-        Args:
-            start_url: The starting URL for crawling
-            selectors: Dictionary of {key: css_selector} pairs
+    def _is_html_response(self, url: str, response: httpx.Response) -> bool:
         """
+        Check response headers to decide whether the body is worth reading.
 
-        logger.info(
-            f"Starting crawl of {start_url} (max {self.config.max_pages} pages)"
-        )
-
-        to_visit = [start_url]
-        domain = urlparse(start_url).netloc
-        pages_scraped = 0
+        Args:
+            url: The requested URL
+            response: Streamed response whose body has not been read
 
-        while to_visit and pages_scraped < self.config.max_pages:
-            url = to_visit.pop(0)
+        Returns:
+            True if the response is HTML within the configured size limit
+        """
+        content_type = response.headers.get("content-type", "")
+        # Media types are case-insensitive (RFC 9110)
+        if not content_type.lower().startswith(HTML_CONTENT_TYPES):
+            logger.info(f"Skipping {url} (content type '{content_type}')")
+            return False
+
+        content_length = response.headers.get("content-length", "")
+        if (
+            self.config.max_page_bytes
+            and content_length.isdigit()
+            and int(content_length) > self.config.max_page_bytes
+        ):
+            logger.warning(f"Skipping {url} ({content_length} bytes)")
+            return False
+
+        return True
+
+    def _html_parser(self, response: httpx.Response) -> lxml.html.HTMLParser:
+        """
+        Create a feed parser decoding with the charset from the response headers.
 
-            # Skip if already visited
-            if url in self.visited:
-                continue
+        Without a declared (or with an unknown) charset, lxml falls back to its
+        own detection from `<meta charset>` and the byte content.
 
-            # Randomize throtlling to resemlbe human browsing patterns
-            if pages_scraped > 0 and self.config.rate_limit:
-                sleep_for = random.random()
-                logger.info(f"Sleeping for {sleep_for}")
-                time.sleep(sleep_for)
+        Args:
+            response: Streamed response whose body has not been read
 
+        Returns:
+            HTML parser ready to be fed the raw body
+        """
+        if response.charset_encoding:
             try:
-                # Check robots.txt
-                if not self._can_crawl(url):
-                    logger.warning(f"Skipping {url} (not allowed by robots.txt)")
-                    continue
-
-                # Make request
-                response = self.session.get(url, timeout=self.config.timeout)
-
-                # Parse HTML
-                soup = BeautifulSoup(response.text, "html.parser")
-
-                # Extract content
-                data = self._extract_content(soup, selectors)
-
-                # Create metadata
-                metadata = {
-                    "url": url,
-                    "scraped_at": time.time(),
-                    "status_code": response.status_code,
-                    # "content_length": len(response.content),
-                    **data,
-                }
-
-                # Save to object store
-                self._save_to_object_store(url, response.text, metadata)
-
-                # Mark as visited
-                self.visited.add(url.rstrip("/"))
-                pages_scraped += 1
-
-                logger.info(f"Crawled {url} ({pages_scraped}/{self.config.max_pages})")
-
-                # Find new internal links
-                new_links = self._extract_internal_links(soup, url, domain)
-
-                for link in new_links:
-                    if link.rstrip("/") not in self.visited and link not in to_visit:
-                        to_visit.append(link)
-
-            except requests.RequestException as e:
-                logger.error(f"Request failed for {url}: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected error crawling {url}: {e}")
+                return lxml.html.HTMLParser(encoding=response.charset_encoding)
+            except LookupError:
+                logger.debug(f"Unknown charset '{response.charset_encoding}'")
+        return lxml.html.HTMLParser()
 
-        logger.info(f"Crawl completed. Visited {pages_scraped} pages.")
-
-    def _extract_internal_links(
+    def _scrape_page(
         self,
-        soup: BeautifulSoup,
-        current_url: str,
+        url: str,
+        selectors: List[Tuple[str, etree.XPath]],
         domain: str,
-    ) -> List[str]:
+    ) -> Optional[List[str]]:
         """
-        Extract internal links from a page.
+        Fetch, extract and store a single page. Runs on a crawl worker thread.
 
         Args:
-            soup: BeautifulSoup object
-            current_url: The current page URL
+            url: The URL to scrape
+            selectors: Compiled (key, selector) pairs from crawl_site
             domain: The domain to restrict links to
 
         Returns:
-            List of internal URLs
+            Internal links found on the page, or None if the page was skipped
+            (disallowed by robots.txt, not HTML or too large)
+        """
+        # Check robots.txt
+        if not self._can_crawl(url):
+            logger.warning(f"Skipping {url} (not allowed by robots.txt)")
+            return None
+
+        # Only block when this host is being hit faster than the configured rate
+        if self.config.rate_limit:
+            host = urlsplit(url).netloc
+            with self._state_lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    bucket = TokenBucket(self.config.requests_per_second)
+                    self._buckets[host] = bucket
+            # Sleeping happens outside the state lock
+            waited = bucket.take()
+            if waited:
+                logger.debug(f"Rate limited {host} for {waited:.3f}s")
+
+        # Stream the body into lxml as it arrives, keeping the bytes for upload
+        chunks = []
+        with self.session.stream(url, timeout=self.config.timeout) as response:
+            # Decide from the headers before any of the body is read
+            if not self._is_html_response(url, response):
+                return None
+
+            parser = self._html_parser(response)
+
+            received = 0
+            for chunk in response.iter_bytes(RESPONSE_CHUNK_SIZE):
+                received += len(chunk)
+                if self.config.max_page_bytes and received > self.config.max_page_bytes:
+                    logger.warning(
+                        f"Skipping {url} (body exceeds {self.config.max_page_bytes} bytes)"
+                    )
+                    return None
+                chunks.append(chunk)
+                parser.feed(chunk)
+        raw_html = b"".join(chunks)
+
+        # An empty or unparseable body is stored as a page without content
+        try:
+            tree = parser.close() if raw_html else None
+        except (etree.XMLSyntaxError, etree.ParserError) as e:
+            logger.debug(f"No parseable HTML at {url}: {e}")
+            tree = None
+
+        if tree is None:
+            data, links = dict.fromkeys(key for key, _ in selectors), []
+        else:
+            # Extract content and links in one pass over the tree
+            data, links = self._extract_page(tree, selectors, url, domain)
+
+        # Create metadata
+        metadata = {
+            "url": url,
+            "scraped_at": time.time(),
+            "status_code": response.status_code,
+            # "content_length": len(raw_html),
+            **data,
+        }
+
+        # Save to object store
+        self._save_to_object_store(url, raw_html, metadata)
+
+        return links
+
+    def crawl_site(
+        self,
+        start_url: str,
+        selectors: Dict[str, str],
+    ) -> None:
         """
-        links = []
+        Crawl a website and scrape all internal pages.
 
-        for link in soup.find_all("a", href=True):
-            href = link["href"]
+        Up to `config.concurrency` pages are fetched at once. The frontier and
+        visited set are confined to this dispatcher thread, so workers never
+        touch them and they need no lock.
 
-            # Skip empty, javascript, mailto, etc.
-            if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
-                continue
+        Args:
+            start_url: The starting URL for crawling
+            selectors: Dictionary of {key: css_selector} pairs
+        """
 
-            try:
-                # Resolve relative URLs
-                absolute_url = urljoin(current_url, href)
+        logger.info(
+            f"Starting crawl of {start_url} (max {self.config.max_pages} pages)"
+        )
 
-                # Check if it's an internal link
-                if urlparse(absolute_url).netloc == domain:
-                    links.append(absolute_url)
+        # Compile selectors once for the whole crawl; a bad selector fails here
+        compiled = [(key, _compile_css(css)) for key, css in selectors.items()]
 
-            except Exception as e:
-                logger.debug(f"Could not process link {href}: {e}")
+        # Insertion-ordered dict as a FIFO frontier with O(1) membership,
+        # holding canonical URLs only
+        start_url = self._canonicalize(start_url)
+        frontier: Dict[str, None] = {start_url: None}
+        domain = urlparse(start_url).netloc
+        pages_scraped = 0
+        in_flight: Dict[concurrent.futures.Future, str] = {}
+
+        # Uploads overlap with later fetches; leaving the block waits for both
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.upload_concurrency
+        ) as self._upload_executor, concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.concurrency
+        ) as executor:
+            while frontier or in_flight:
+                # Top up the pool, never dispatching more than max_pages
+                while (
+                    frontier
+                    and len(in_flight) < self.config.concurrency
+                    and pages_scraped + len(in_flight) < self.config.max_pages
+                ):
+                    url = next(iter(frontier))
+                    del frontier[url]
+
+                    # Skip if already visited, otherwise mark as visited
+                    if url in self.visited:
+                        continue
+                    self.visited.add(url)
+
+                    future = executor.submit(self._scrape_page, url, compiled, domain)
+                    in_flight[future] = url
+
+                if not in_flight:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+
+                for future in done:
+                    url = in_flight.pop(future)
+                    try:
+                        new_links = future.result()
+                    except httpx.HTTPError as e:
+                        logger.error(f"Request failed for {url}: {e}")
+                        continue
+                    except Exception as e:
+                        logger.error(f"Unexpected error crawling {url}: {e}")
+                        continue
+
+                    if new_links is None:
+                        continue
+
+                    pages_scraped += 1
+                    logger.info(
+                        f"Crawled {url} ({pages_scraped}/{self.config.max_pages})"
+                    )
+
+                    for link in map(self._canonicalize, new_links):
+                        if link not in self.visited and link not in frontier:
+                            frontier[link] = None
 
-        return links
+        logger.info(f"Crawl completed. Visited {pages_scraped} pages.")